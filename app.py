@@ -1,138 +1,256 @@
+import os
+import pickle
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FetchTimeout
+from pathlib import Path
+
 import streamlit as st
 import yfinance as yf
-import pandas as pd
-import numpy_financial as npf
+import numpy as np
+
+from dcf import calculate_dcf
+from industry import get_industry_defaults
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="Smart DCF Modeler", layout="wide")
 
 # --- 0. INDUSTRY LOGIC ENGINE ---
-def get_industry_defaults(sector):
-    """Returns default WACC and Growth presets based on Sector."""
-    # Default: Moderate Risk/Growth
-    defaults = {
-        "bear_g": 5.0, "base_g": 10.0, "bull_g": 15.0,
-        "bear_w": 10.0, "base_w": 9.0, "bull_w": 8.0
-    }
-    
-    if not sector: return defaults
-
-    sector = sector.lower()
-    
-    if "technology" in sector:
-        # High Growth, Higher Volatility
-        return {
-            "bear_g": 8.0, "base_g": 14.0, "bull_g": 20.0,
-            "bear_w": 11.0, "base_w": 10.0, "bull_w": 9.0
-        }
-    elif "utilities" in sector or "energy" in sector:
-        # Low Growth, Low Risk (Stable Cash Flows)
-        return {
-            "bear_g": 1.0, "base_g": 3.0, "bull_g": 5.0,
-            "bear_w": 7.0, "base_w": 6.0, "bull_w": 5.0
-        }
-    elif "healthcare" in sector:
-        # Moderate/High Growth, Moderate Risk
-        return {
-            "bear_g": 4.0, "base_g": 8.0, "bull_g": 12.0,
-            "bear_w": 9.0, "base_w": 8.0, "bull_w": 7.0
-        }
-    elif "consumer defensive" in sector:
-        # Slow Growth, Safe
-        return {
-            "bear_g": 2.0, "base_g": 5.0, "bull_g": 7.0,
-            "bear_w": 7.5, "base_w": 6.5, "bull_w": 6.0
-        }
-    elif "financial" in sector or "real estate" in sector:
-        # Rate Sensitive
-        return {
-            "bear_g": 3.0, "base_g": 6.0, "bull_g": 9.0,
-            "bear_w": 10.0, "base_w": 8.5, "bull_w": 7.5
-        }
-        
-    return defaults
+# Lives in industry.py (get_industry_defaults) so its memoized presets survive reruns
 
 # --- 1. DATA FETCHING ---
+# Statements survive restarts in a local disk cache, keyed yfinance.<ticker>.<endpoint>
+CACHE_DIR = Path(".yf_cache")
+STATEMENT_TTL = 86400
+# When Yahoo fails, an expired disk copy is only served while it is younger than this
+STATEMENT_MAX_STALE = 90 * 86400
+# Give up on a stalled Yahoo fetch after this many seconds
+FETCH_TIMEOUT = 10
+
+# Ticker comes straight from the sidebar, so only symbol characters may reach a filename
+_TICKER_RE = re.compile(r"[A-Z0-9.^=-]+")
+
+def _cache_path(ticker, endpoint):
+    if not _TICKER_RE.fullmatch(ticker):
+        raise ValueError(f"Invalid ticker symbol: {ticker!r}")
+    return CACHE_DIR / f"yfinance.{ticker}.{endpoint}.pkl"
+
+def _read_cache(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+def _is_usable_stale(path):
+    return path.exists() and time.time() - path.stat().st_mtime < STATEMENT_MAX_STALE
+
+def _disk_cached(ticker, endpoint, fetch, ttl):
+    """Returns the pickled result of fetch() from disk if younger than ttl, else refetches.
+
+    Never serves an expired copy itself: failures raise so the caller can fall back to
+    _stale_statements outside the st.cache_data memo.
+    """
+    path = _cache_path(ticker, endpoint)
+    if path.exists() and time.time() - path.stat().st_mtime < ttl:
+        return _read_cache(path)
+
+    value = fetch()
+
+    if value.empty:
+        # yfinance often signals failure with an empty frame rather than raising. With no
+        # usable copy on disk, treat it as a genuine "no statements" answer instead
+        if _is_usable_stale(path):
+            raise ValueError(f"Yahoo returned an empty {endpoint} for {ticker}")
+        return value
+
+    # Each writer gets its own temp file, renamed into place, so concurrent sessions and
+    # pool threads never collide or read a half-written file
+    CACHE_DIR.mkdir(exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=CACHE_DIR, suffix=".tmp", delete=False) as f:
+        try:
+            pickle.dump(value, f)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    try:
+        os.replace(f.name, path)
+    except BaseException:
+        os.unlink(f.name)
+        raise
+    return value
+
+@st.cache_resource
+def _fetch_executor():
+    """Worker pool for statement fetches, built once and shared across reruns and sessions."""
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="yf-fetch")
+
+def _result_by(future, ticker, endpoint, deadline):
+    """Waits for a _disk_cached future until deadline (time.monotonic())."""
+    try:
+        return future.result(timeout=max(0, deadline - time.monotonic()))
+    except FetchTimeout:
+        raise TimeoutError(f"Yahoo did not return the {endpoint} for {ticker} within {FETCH_TIMEOUT}s") from None
+
+def _statement_figures(bs, cf):
+    """Returns net debt and FCF from the latest filing (first column) of each statement."""
+    # Only a few rows are used: one reindex pulls exactly those, with missing rows
+    # (common for ETFs) coming back as NaN instead of raising
+    total_debt, cash = bs.reindex(['Total Debt', 'Cash And Cash Equivalents']).iloc[:, 0].fillna(0)
+    ocf, capex, free_cf = cf.reindex(['Operating Cash Flow', 'Capital Expenditure', 'Free Cash Flow']).iloc[:, 0]
+
+    # Net Debt Calculation
+    net_debt = total_debt - cash
+
+    # FCF Calculation
+    if not (np.isnan(ocf) or np.isnan(capex)):
+        fcf = ocf + capex
+    else:
+        fcf = 0 if np.isnan(free_cf) else free_cf
+
+    return {"net_debt": net_debt, "fcf": fcf}
+
+def _stale_statements(ticker):
+    """Returns (statements, cached_on) from expired disk copies, or None if none are usable."""
+    paths = [_cache_path(ticker, endpoint) for endpoint in ("balance_sheet", "cashflow")]
+    if not all(_is_usable_stale(path) for path in paths):
+        return None
+
+    bs, cf = (_read_cache(path) for path in paths)
+    # Both copies must come from the same filing, or net debt and FCF would not line up
+    if bs.columns[0] != cf.columns[0]:
+        return None
+
+    cached_on = time.strftime("%Y-%m-%d", time.localtime(min(path.stat().st_mtime for path in paths)))
+    return _statement_figures(bs, cf), cached_on
+
+# Quotes are served stale-while-revalidate: once a ticker has been fetched, an expired price
+# is returned immediately while a background thread refreshes it for the next rerun. Prices
+# older than QUOTE_MAX_STALE are not served; the lookup blocks on a fresh fetch instead.
+QUOTE_TTL = 30
+QUOTE_MAX_STALE = 300
+
+@st.cache_resource
+def _quote_store():
+    """Quote cache shared by all sessions: (ticker -> (quote, fetched_at), refreshing, lock).
+
+    Lives in st.cache_resource because module globals are recreated on every rerun.
+    """
+    return {}, set(), threading.Lock()
+
+def _fetch_quote(ticker, store):
+    """Returns (quote, error) with the live price from yfinance's lightweight fast_info."""
+    price = yf.Ticker(ticker).fast_info.last_price
+
+    if not price or np.isnan(price):
+        return None, f"Could not fetch data for {ticker}. Is the symbol correct?"
+
+    quotes, _, lock = store
+    with lock:
+        quotes[ticker] = ({"price": price}, time.time())
+    return {"price": price}, None
+
+def _refresh_quote(ticker, store):
+    # Runs without a script run context, so it only touches the store it was handed
+    try:
+        _fetch_quote(ticker, store)
+    except Exception:
+        pass  # Keep serving the stale price; the next rerun retries
+    finally:
+        _, refreshing, lock = store
+        with lock:
+            refreshing.discard(ticker)
+
+def _get_quote(ticker):
+    """Returns (quote, error), serving a stale price while a background refresh runs."""
+    store = _quote_store()
+    quotes, refreshing, lock = store
+    with lock:
+        cached = quotes.get(ticker)
+        age = time.time() - cached[1] if cached else None
+        if cached and QUOTE_TTL <= age < QUOTE_MAX_STALE and ticker not in refreshing:
+            refreshing.add(ticker)
+            threading.Thread(target=_refresh_quote, args=(ticker, store), daemon=True).start()
+
+    if cached and age < QUOTE_MAX_STALE:
+        return cached[0], None
+    # Nothing (recent enough) to serve for this ticker, so this fetch has to block
+    return _fetch_quote(ticker, store)
+
+# Profiles and statements only change quarterly, so they are cached for a day. Cached
+# functions return (data, error) instead of calling st.error themselves: side effects inside
+# a cached function only fire on a cache miss. Unexpected exceptions are left to propagate
+# so transient failures are never cached.
+@st.cache_data(ttl=86400, show_spinner=False)
+def _get_profile(ticker):
+    """Returns (profile, error) with the slow-moving fields only the full info blob has."""
+    info = yf.Ticker(ticker).info
+
+    return {
+        "name": info.get('longName', ticker),
+        "sector": info.get('sector', 'Unknown'),
+        "peg_ratio": info.get('pegRatio', None),
+        "image": info.get('logo_url', ''),
+        "description": info.get('longBusinessSummary', 'No description'),
+        "shares_out": info.get('sharesOutstanding', 0),
+        "beta": info.get('beta', 1.0)
+    }, None
+
+@st.cache_data(ttl=STATEMENT_TTL, show_spinner=False)
+def _get_statements(ticker):
+    """Returns (statements, error) with net debt and FCF from the latest filings."""
+    stock = yf.Ticker(ticker)
+    # Both statements are independent Yahoo requests, so fetch them concurrently. A stalled
+    # fetch is abandoned after FETCH_TIMEOUT and finishes (filling the disk cache) in the pool.
+    # Any failure raises, so a degraded result never enters the 24h memo
+    ex = _fetch_executor()
+    bs_future = ex.submit(_disk_cached, ticker, "balance_sheet", lambda: stock.balance_sheet, STATEMENT_TTL)
+    cf_future = ex.submit(_disk_cached, ticker, "cashflow", lambda: stock.cashflow, STATEMENT_TTL)
+    # One deadline shared by both, so two stalled fetches still cost FETCH_TIMEOUT in total
+    deadline = time.monotonic() + FETCH_TIMEOUT
+    bs = _result_by(bs_future, ticker, "balance_sheet", deadline)
+    cf = _result_by(cf_future, ticker, "cashflow", deadline)
+
+    if bs.empty or cf.empty:
+        return None, "Financial statements not found. Using partial data."
+
+    return _statement_figures(bs, cf), None
+
 def get_company_data(ticker):
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
-        if 'currentPrice' not in info:
-            st.error(f"Could not fetch data for {ticker}. Is the symbol correct?")
+        quote, error = _get_quote(ticker)
+        if error:
+            st.error(error)
             return None
 
-        # Basic Info
-        price = info.get('currentPrice', 0)
-        shares = info.get('sharesOutstanding', 0)
-        name = info.get('longName', ticker)
-        sector = info.get('sector', 'Unknown')
-        peg_ratio = info.get('pegRatio', None)
-        
-        # Financial Statements
-        bs = stock.balance_sheet
-        cf = stock.cashflow
-        
-        if bs.empty or cf.empty:
-            st.warning("Financial statements not found. Using partial data.")
+        profile, error = _get_profile(ticker)
+        if error:
+            st.error(error)
             return None
 
-        # Net Debt Calculation
         try:
-            total_debt = bs.loc['Total Debt'].iloc[0]
-        except KeyError:
-            total_debt = 0
-        try:
-            cash = bs.loc['Cash And Cash Equivalents'].iloc[0]
-        except KeyError:
-            cash = 0
-        net_debt = total_debt - cash
+            statements, error = _get_statements(ticker)
+        except Exception:
+            # Yahoo failed or stalled: fall back to expired disk copies here, outside the
+            # st.cache_data memo, so the next analysis retries Yahoo
+            stale = _stale_statements(ticker)
+            if stale is None: raise
+            statements, cached_on = stale
+            error = None
+            st.warning(f"Yahoo did not return fresh financial statements. Showing a cached copy from {cached_on}.")
 
-        # FCF Calculation
-        try:
-            ocf = cf.loc['Operating Cash Flow'].iloc[0]
-            capex = cf.loc['Capital Expenditure'].iloc[0]
-            fcf = ocf + capex
-        except KeyError:
-            fcf = cf.loc['Free Cash Flow'].iloc[0] if 'Free Cash Flow' in cf.index else 0
-
-        return {
-            "price": price,
-            "name": name,
-            "sector": sector,
-            "peg_ratio": peg_ratio,
-            "image": info.get('logo_url', ''),
-            "description": info.get('longBusinessSummary', 'No description'),
-            "shares_out": shares,
-            "net_debt": net_debt,
-            "fcf": fcf,
-            "beta": info.get('beta', 1.0)
-        }
+        if error:
+            st.warning(error)
+            return None
+
+        return {"ticker": ticker, **quote, **profile, **statements}
 
     except Exception as e:
         st.error(f"Error fetching data: {str(e)}")
         return None
 
 # --- 2. DCF LOGIC ---
-def calculate_dcf(fcf, growth_rate, wacc, terminal_growth, shares, net_debt):
-    if shares == 0: return 0
-    
-    future_fcf = []
-    current_fcf = fcf
-    
-    for i in range(1, 6):
-        current_fcf = current_fcf * (1 + growth_rate)
-        future_fcf.append(current_fcf)
-    
-    terminal_value = (future_fcf[-1] * (1 + terminal_growth)) / (wacc - terminal_growth)
-    
-    discount_factors = [(1 + wacc) ** i for i in range(1, 6)]
-    pv_fcf = sum([f / d for f, d in zip(future_fcf, discount_factors)])
-    
-    pv_terminal = terminal_value / ((1 + wacc) ** 5)
-    
-    equity_value = (pv_fcf + pv_terminal) - net_debt
-    return equity_value / shares
+# Lives in dcf.py (calculate_dcf) so its compiled kernels survive reruns
 
 # --- 3. UI LAYOUT ---
 st.title("📊 Intelligent DCF Modeler")
@@ -150,6 +268,12 @@ with st.sidebar:
 
 if 'data' in st.session_state:
     data = st.session_state['data']
+    # Pick up the latest background-refreshed price; if Yahoo fails, keep the last known price
+    try:
+        quote, _ = _get_quote(data['ticker'])
+    except Exception:
+        quote = None
+    if quote: data = {**data, **quote}
     defaults = st.session_state.get('defaults', get_industry_defaults(None))
     
     # --- HEADER SECTION ---
@@ -158,7 +282,7 @@ if 'data' in st.session_state:
         st.subheader(f"{data['name']} ({ticker})")
         st.caption(f"Sector: {data['sector']}")
     with c2:
-        st.metric("Current Price", f"${data['price']}")
+        st.metric("Current Price", f"${data['price']:.2f}")
 
     # --- KEY METRICS BAR ---
     m1, m2, m3, m4 = st.columns(4)
@@ -202,9 +326,19 @@ if 'data' in st.session_state:
     with u2: fcf_val = st.number_input("Free Cash Flow Input", value=float(data['fcf']))
 
     # --- CALCULATIONS ---
-    bear_p = calculate_dcf(fcf_val, bear_g, bear_w, term_g, data['shares_out'], data['net_debt'])
-    base_p = calculate_dcf(fcf_val, base_g, base_w, term_g, data['shares_out'], data['net_debt'])
-    bull_p = calculate_dcf(fcf_val, bull_g, bull_w, term_g, data['shares_out'], data['net_debt'])
+    # Every widget interaction reruns the script, so only revalue when a DCF input changed
+    dcf_key = (fcf_val, bear_g, bear_w, base_g, base_w, bull_g, bull_w, term_g,
+               data['shares_out'], data['net_debt'])
+    if st.session_state.get('_dcf_key') != dcf_key:
+        # All three scenarios are valued in a single vectorized call
+        st.session_state['_dcf_cache'] = tuple(calculate_dcf(
+            fcf_val,
+            np.array([bear_g, base_g, bull_g]),
+            np.array([bear_w, base_w, bull_w]),
+            term_g, data['shares_out'], data['net_debt']
+        ))
+        st.session_state['_dcf_key'] = dcf_key
+    bear_p, base_p, bull_p = st.session_state['_dcf_cache']
 
     # --- OUTPUT ---
     st.markdown("### 🎯 Valuation Targets")
@@ -0,0 +1,58 @@
+"""DCF valuation kernels.
+
+Kept out of app.py because Streamlit re-executes the script on every rerun: in an imported
+module the Numba dispatchers are built once per process instead of once per rerun.
+"""
+import numpy as np
+from numba import njit, prange
+
+# Scalar kernel compiled once per deploy (cache=True). error_model='numpy' keeps
+# division by zero as inf rather than raising inside compiled code.
+@njit(cache=True, error_model='numpy')
+def _dcf_kernel(fcf, growth_rate, wacc, terminal_growth, shares, net_debt):
+    if shares == 0: return 0.0
+    
+    # 5 years of growing FCF is a geometric series with ratio r, so PV has a closed form
+    r = (1 + growth_rate) / (1 + wacc)
+    r2 = r * r
+    r5 = r2 * r2 * r  # Shared by the FCF and terminal PVs; 3 multiplies instead of a pow call
+    if wacc == growth_rate:
+        pv_fcf = fcf * 5
+    else:
+        pv_fcf = fcf * (1 + growth_rate) / (wacc - growth_rate) * (1 - r5)
+    
+    # Terminal value on year-5 FCF, discounted back 5 years
+    pv_terminal = fcf * r5 * (1 + terminal_growth) / (wacc - terminal_growth)
+    
+    equity_value = (pv_fcf + pv_terminal) - net_debt
+    return equity_value / shares
+
+# Serial loop over a handful of scenarios; safe to call from concurrent Streamlit sessions
+@njit(cache=True, error_model='numpy')
+def _dcf_batch(fcf, growth_rates, waccs, terminal_growth, shares, net_debt):
+    out = np.empty(growth_rates.shape[0])
+    for i in range(growth_rates.shape[0]):
+        out[i] = _dcf_kernel(fcf, growth_rates[i], waccs[i], terminal_growth, shares, net_debt)
+    return out
+
+# Large sweeps (sensitivity tables / Monte Carlo), parallel over the scenario axis. Not used
+# by the UI: without tbb or OpenMP, Numba falls back to the workqueue threading layer,
+# which aborts the process when called from several threads at once.
+@njit(parallel=True, cache=True, error_model='numpy')
+def dcf_sweep(fcf, growth_rates, waccs, terminal_growth, shares, net_debt):
+    out = np.empty(growth_rates.shape[0])
+    for i in prange(growth_rates.shape[0]):
+        out[i] = _dcf_kernel(fcf, growth_rates[i], waccs[i], terminal_growth, shares, net_debt)
+    return out
+
+def calculate_dcf(fcf, growth_rate, wacc, terminal_growth, shares, net_debt):
+    """Per-share value for each (growth, WACC) scenario. Accepts scalars or arrays."""
+    fixed = (float(terminal_growth), float(shares), float(net_debt))
+    if np.ndim(growth_rate) == 0 and np.ndim(wacc) == 0:
+        return _dcf_kernel(float(fcf), float(growth_rate), float(wacc), *fixed)
+    
+    growth_rate, wacc = np.broadcast_arrays(
+        np.asarray(growth_rate, dtype=np.float64), np.asarray(wacc, dtype=np.float64)
+    )
+    prices = _dcf_batch(float(fcf), growth_rate.ravel(), wacc.ravel(), *fixed)
+    return prices.reshape(growth_rate.shape)
@@ -0,0 +1,68 @@
+"""Sector-based scenario presets.
+
+Kept out of app.py so the lru_cache on get_industry_defaults survives Streamlit reruns.
+"""
+from functools import lru_cache
+
+# Default: Moderate Risk/Growth
+_DEFAULT_PRESET = {
+    "bear_g": 5.0, "base_g": 10.0, "bull_g": 15.0,
+    "bear_w": 10.0, "base_w": 9.0, "bull_w": 8.0
+}
+
+# High Growth, Higher Volatility
+_TECH_PRESET = {
+    "bear_g": 8.0, "base_g": 14.0, "bull_g": 20.0,
+    "bear_w": 11.0, "base_w": 10.0, "bull_w": 9.0
+}
+
+# Low Growth, Low Risk (Stable Cash Flows)
+_STABLE_PRESET = {
+    "bear_g": 1.0, "base_g": 3.0, "bull_g": 5.0,
+    "bear_w": 7.0, "base_w": 6.0, "bull_w": 5.0
+}
+
+# Moderate/High Growth, Moderate Risk
+_HEALTHCARE_PRESET = {
+    "bear_g": 4.0, "base_g": 8.0, "bull_g": 12.0,
+    "bear_w": 9.0, "base_w": 8.0, "bull_w": 7.0
+}
+
+# Slow Growth, Safe
+_DEFENSIVE_PRESET = {
+    "bear_g": 2.0, "base_g": 5.0, "bull_g": 7.0,
+    "bear_w": 7.5, "base_w": 6.5, "bull_w": 6.0
+}
+
+# Rate Sensitive
+_RATE_SENSITIVE_PRESET = {
+    "bear_g": 3.0, "base_g": 6.0, "bull_g": 9.0,
+    "bear_w": 10.0, "base_w": 8.5, "bull_w": 7.5
+}
+
+# Sector keyword -> preset. Keys are yfinance sector names where possible, so most lookups
+# are an exact hit; anything else is matched by keyword in this order (first match wins)
+_SECTOR_DEFAULTS = {
+    "technology": _TECH_PRESET,
+    "utilities": _STABLE_PRESET,
+    "energy": _STABLE_PRESET,
+    "healthcare": _HEALTHCARE_PRESET,
+    "consumer defensive": _DEFENSIVE_PRESET,
+    "financial": _RATE_SENSITIVE_PRESET,
+    "real estate": _RATE_SENSITIVE_PRESET,
+}
+
+@lru_cache(maxsize=None)
+def get_industry_defaults(sector):
+    """Returns default WACC and Growth presets based on Sector."""
+    if not sector: return _DEFAULT_PRESET
+
+    sector = sector.lower()
+
+    preset = _SECTOR_DEFAULTS.get(sector)
+    if preset is not None: return preset
+
+    for keyword, preset in _SECTOR_DEFAULTS.items():
+        if keyword in sector: return preset
+
+    return _DEFAULT_PRESET